@@ -1,27 +1,18 @@
 import os
+import time
+import functools
+import random
 import logging
+from typing import Final
 import asyncio
 import aiohttp
+import orjson
 from langchain_openai import ChatOpenAI
 from langchain_classic.agents import create_tool_calling_agent, AgentExecutor
 from langchain_core.tools import tool
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_mcp_adapters.client import MultiServerMCPClient
 
-# --- Observability Setup (Arize Phoenix) ---
-try:
-    from phoenix.otel import register
-    from openinference.instrumentation.langchain import LangChainInstrumentor
-
-    # PHOENIX_COLLECTOR_ENDPOINT is set in docker-compose.yml
-    tracer_provider = register()
-    LangChainInstrumentor().instrument(tracer_provider=tracer_provider)
-    logging.getLogger(__name__).info("Arize Phoenix instrumentation initialized.")
-except ImportError:
-    logging.getLogger(__name__).warning("Arize Phoenix libraries not found. Tracing disabled.")
-except Exception as e:
-    logging.getLogger(__name__).warning(f"Failed to initialize Arize Phoenix: {e}")
-
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -35,27 +26,130 @@ OPENROUTER_MODEL = os.environ.get(
     "OPENROUTER_MODEL", "google/gemini-2.0-flash-lite-preview-02-05:free"
 )
 MCP_SERVER_URL = os.environ.get("MCP_SERVER_URL", "http://mcp-server:8000/mcp")
+MCP_DISCOVERY_TIMEOUT = float(os.environ.get("MCP_DISCOVERY_TIMEOUT", "15"))
+MCP_CONNECT_BUDGET = float(os.environ.get("MCP_CONNECT_BUDGET", "180"))
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Exponential backoff with jitter for a 0-based retry attempt.
+
+    Jitter keeps restarting containers from retrying in lockstep.
+    """
+    return min(cap, base * 2 ** attempt) * (0.5 + random.random())
+
+# --- Observability Setup (Arize Phoenix) ---
+
+PHOENIX_ENABLED = os.environ.get("PHOENIX_ENABLED", "0") == "1"
+_tracing_ready = False
+
+
+def setup_tracing():
+    """Initialize Arize Phoenix tracing when PHOENIX_ENABLED=1.
+
+    The Phoenix / OpenInference imports are deferred to here so processes that
+    don't trace never pay their import time and memory.
+    """
+    global _tracing_ready
+    if _tracing_ready or not PHOENIX_ENABLED:
+        return
+    _tracing_ready = True
+    try:
+        from phoenix.otel import register
+        from openinference.instrumentation.langchain import LangChainInstrumentor
+
+        # PHOENIX_COLLECTOR_ENDPOINT is set in docker-compose.yml
+        tracer_provider = register()
+        LangChainInstrumentor().instrument(tracer_provider=tracer_provider)
+        logger.info("Arize Phoenix instrumentation initialized.")
+    except ImportError:
+        logger.warning("Arize Phoenix libraries not found. Tracing disabled.")
+    except Exception as e:
+        logger.warning(f"Failed to initialize Arize Phoenix: {e}")
+
+# --- Shared HTTP Session ---
+
+# One session per event loop so outbound calls share the connection pool
+# (keep-alive, TLS and DNS reuse) instead of re-handshaking on every request.
+_HTTP_SESSION: aiohttp.ClientSession | None = None
+_HTTP_SESSION_LOOP: asyncio.AbstractEventLoop | None = None
+
+
+async def get_http_session() -> aiohttp.ClientSession:
+    """Return the shared aiohttp session, creating it on first use."""
+    global _HTTP_SESSION, _HTTP_SESSION_LOOP
+    loop = asyncio.get_running_loop()
+    if _HTTP_SESSION is None or _HTTP_SESSION.closed or _HTTP_SESSION_LOOP is not loop:
+        _HTTP_SESSION = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=10),
+            connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300, keepalive_timeout=60),
+            # We never need cookies from these APIs; skip the jar bookkeeping
+            cookie_jar=aiohttp.DummyCookieJar(),
+        )
+        _HTTP_SESSION_LOOP = loop
+    return _HTTP_SESSION
+
+
+async def close_http_session():
+    """Close the shared aiohttp session. Call once on shutdown."""
+    global _HTTP_SESSION, _HTTP_SESSION_LOOP
+    if _HTTP_SESSION is not None and not _HTTP_SESSION.closed:
+        await _HTTP_SESSION.close()
+    _HTTP_SESSION = None
+    _HTTP_SESSION_LOOP = None
 
 # --- Local Tool Definitions ---
 
-async def get_london_weather():
-    """Fetch current weather for London from Open-Meteo API."""
-    url = "https://api.open-meteo.com/v1/forecast"
-    params = {
-        "latitude": 51.5072,
-        "longitude": -0.1276,
-        "current_weather": "true",
-    }
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(url, params=params) as response:
-                if response.status != 200:
-                    return None
-                data = await response.json()
-                return data.get("current_weather")
-        except Exception as e:
-            logger.error(f"Failed to fetch weather: {e}")
-            return None
+_WEATHER_URL = "https://api.open-meteo.com/v1/forecast"
+_WEATHER_PARAMS = {
+    "latitude": 51.5072,
+    "longitude": -0.1276,
+    "current_weather": "true",
+}
+# Open-Meteo updates current conditions every 15 minutes, so a short-lived
+# copy serves the daily check, the agent tool and retries alike
+WEATHER_CACHE_TTL = 600.0
+_weather_cache = None
+_weather_cache_at = 0.0
+# Held while fetching so concurrent callers on a cold cache share one request
+_weather_lock = asyncio.Lock()
+
+async def _fetch_london_weather(session: aiohttp.ClientSession | None):
+    """Hit Open-Meteo for London's current weather, or return None on failure."""
+    if session is None or session.closed:
+        session = await get_http_session()
+    try:
+        async with session.get(_WEATHER_URL, params=_WEATHER_PARAMS) as response:
+            if response.status != 200:
+                return None
+            data = orjson.loads(await response.read())
+            return data.get("current_weather")
+    except Exception as e:
+        logger.error(f"Failed to fetch weather: {e}")
+        return None
+
+def _cached_weather():
+    if _weather_cache is not None and time.monotonic() - _weather_cache_at < WEATHER_CACHE_TTL:
+        return _weather_cache
+    return None
+
+async def get_london_weather(session: aiohttp.ClientSession | None = None):
+    """Fetch current weather for London from Open-Meteo API.
+
+    Uses the given session if it is still open, otherwise the shared one.
+    Successful results are reused for WEATHER_CACHE_TTL seconds.
+    """
+    global _weather_cache, _weather_cache_at
+    weather = _cached_weather()
+    if weather is not None:
+        return weather
+    async with _weather_lock:
+        # Another caller may have filled the cache while we waited
+        weather = _cached_weather()
+        if weather is None:
+            weather = await _fetch_london_weather(session)
+            if weather is not None:
+                _weather_cache, _weather_cache_at = weather, time.monotonic()
+    return weather
 
 @tool
 async def get_current_weather_london():
@@ -64,21 +158,113 @@ async def get_current_weather_london():
 
 # --- Persona Definition ---
 
+@functools.lru_cache(maxsize=None)
+def build_prompt(system_instructions):
+    """Build (once per distinct instruction string) the chat prompt for a persona."""
+    return ChatPromptTemplate.from_messages(
+        [
+            ("system", system_instructions),
+            ("human", "{input}"),
+            ("placeholder", "{agent_scratchpad}"),
+        ]
+    )
+
+# Compiled agents keyed by (persona name, tool names), so re-initializing
+# personas with an unchanged tool set reuses the existing executor.
+_AGENT_CACHE: dict[tuple[str, tuple[str, ...]], AgentExecutor] = {}
+
 class Persona:
-    def __init__(self, name, description, system_instructions, tools, llm_model):
+    def __init__(self, name, description, prompt, tools, llm_model):
         self.name = name
         self.description = description
         self.tools = tools
-        
-        self.prompt = ChatPromptTemplate.from_messages(
-            [
-                ("system", system_instructions),
-                ("human", "{input}"),
-                ("placeholder", "{agent_scratchpad}"),
-            ]
-        )
-        self.agent = create_tool_calling_agent(llm_model, tools, self.prompt)
-        self.executor = AgentExecutor(agent=self.agent, tools=tools, verbose=True)
+        self.prompt = prompt
+
+        key = (name, tuple(sorted(t.name for t in tools)))
+        executor = _AGENT_CACHE.get(key)
+        if executor is None:
+            agent = create_tool_calling_agent(llm_model, tools, prompt)
+            executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
+            _AGENT_CACHE[key] = executor
+        self.agent = executor.agent
+        self.executor = executor
+
+# --- Persona Prompts ---
+
+GENERAL_SYSTEM: Final[str] = (
+    "You are a helpful AI assistant. When a user asks about historical events for today, you MUST: "
+    "1. Call the 'get_history_all' tool, which returns events from Wikipedia, Britannica AND onthisday.com at once. "
+    "Do NOT skip any of the three sources in your answer. Each provides unique events. "
+    "2. Combine and cross-reference the information from all 3 sources. "
+    "3. Provide ONLY the final summarized response organized into these sections: "
+    "   - 🌟 Featured Events "
+    "   - 📅 Other Notable Events "
+    "   - 👶 Notable Births "
+    "   - 🕯️ Notable Deaths "
+    "CRITICAL: Do not output your thinking process, internal monologues, or 'Wait, let me check' style commentary. "
+    "Return ONLY the final formatted summary with emojis. No meta-talk."
+)
+WEIGHT_SYSTEM: Final[str] = (
+    "You are a dedicated Weight Tracking Assistant. Help the user log their weight and view their progress. "
+    "If the user discusses unrelated topics, suggest switching to general mode."
+)
+RUST_SYSTEM: Final[str] = (
+    "You are a Rust Programming Tutor (Crab Mode 🦀). Your goal is to teach the user Rust. "
+    "Explain concepts clearly with code examples. Be encouraging and use crab emojis! 🦀 "
+    "If the user asks about other topics, suggest switching to general mode."
+)
+CPP_SYSTEM: Final[str] = (
+    "You are a C++ Programming Tutor. Your goal is to teach the user C++. "
+    "Explain concepts clearly with modern C++ examples (C++11 and later). Be precise and helpful. "
+    "If the user asks about other topics, suggest switching to general mode."
+)
+PYTHON_SYSTEM: Final[str] = (
+    "You are a Python Programming Tutor. Your goal is to teach the user Python. "
+    "Explain concepts clearly with idiomatic Python (Pythonic) examples. Be friendly and helpful. "
+    "If the user asks about other topics, suggest switching to general mode."
+)
+
+GENERAL_PROMPT = build_prompt(GENERAL_SYSTEM)
+WEIGHT_PROMPT = build_prompt(WEIGHT_SYSTEM)
+RUST_PROMPT = build_prompt(RUST_SYSTEM)
+CPP_PROMPT = build_prompt(CPP_SYSTEM)
+PYTHON_PROMPT = build_prompt(PYTHON_SYSTEM)
+
+# --- LLM Response Cache ---
+
+LLM_CACHE_PATH = os.environ.get("LLM_CACHE_PATH", "langchain_cache.db")
+REDIS_URL = os.environ.get("REDIS_URL")
+_llm_cache_ready = False
+
+
+def setup_llm_caching():
+    """Install a LangChain LLM cache so repeated prompts skip the OpenRouter round-trip.
+
+    Uses Redis when REDIS_URL is set (needs the redis package and a reachable
+    server), otherwise a local SQLite file. Safe to call more than once.
+    """
+    global _llm_cache_ready
+    if _llm_cache_ready:
+        return
+    from langchain_core.globals import set_llm_cache
+
+    try:
+        if REDIS_URL:
+            import redis
+            from langchain_community.cache import RedisCache
+
+            set_llm_cache(RedisCache(redis.Redis.from_url(REDIS_URL)))
+            logger.info("LLM cache enabled (Redis).")
+        else:
+            from langchain_community.cache import SQLiteCache
+
+            set_llm_cache(SQLiteCache(database_path=LLM_CACHE_PATH))
+            logger.info(f"LLM cache enabled (SQLite at {LLM_CACHE_PATH}).")
+        _llm_cache_ready = True
+    except ImportError as e:
+        logger.warning(f"LLM cache dependencies not found ({e}). Caching disabled.")
+    except Exception as e:
+        logger.warning(f"Failed to set up LLM cache: {e}")
 
 # --- Agent & Tool Setup ---
 
@@ -92,17 +278,61 @@ llm = ChatOpenAI(
 # Global personas dictionary
 personas = {}
 
+# MCP tool name keywords that route a tool to each persona's tool set
+TOOL_CATEGORIES = {
+    "weight": ("weight", "data"),
+    "rust": ("rust",),
+    "cpp": ("cpp",),
+    "python": ("python",),
+    "history": ("history",),
+}
+
+
+async def warm_up_llm():
+    """Send a tiny request so the first user message doesn't pay connection setup."""
+    # Bypass the LLM cache, or a cached "ping" would skip the connection entirely.
+    # The copy shares llm's HTTP clients, so the warmed pool is the one agents use.
+    await llm.model_copy(update={"cache": False}).ainvoke("ping")
+
+
+def _log_warm_up_result(task: asyncio.Task):
+    if task.cancelled():
+        return
+    if task.exception() is not None:
+        logger.warning(f"LLM warm-up request failed: {task.exception()}")
+    else:
+        logger.info("LLM warm-up request completed.")
+
+
+# Held so the background warm-up isn't garbage-collected mid-request
+_warmup_task = None
+
+
+def start_llm_warm_up():
+    """Start the warm-up in the background unless one is already running."""
+    global _warmup_task
+    if _warmup_task is None or _warmup_task.done():
+        _warmup_task = asyncio.create_task(warm_up_llm())
+        _warmup_task.add_done_callback(_log_warm_up_result)
+
 async def initialize_personas():
     """Initialize personas by loading MCP tools and local tools."""
     global personas
+
+    setup_tracing()
+    setup_llm_caching()
     
     mcp_tools = []
-    max_retries = 5
-    retry_delay = 5
+    attempt = 0
+    deadline = time.monotonic() + MCP_CONNECT_BUDGET
+
+    # Open the LLM connection while we wait on MCP discovery; it finishes in the
+    # background, so readiness never waits on the (billed) round-trip
+    start_llm_warm_up()
     
     logger.info(f"Connecting to MCP server at {MCP_SERVER_URL}...")
     
-    for attempt in range(max_retries):
+    while True:
         try:
             # MultiServerMCPClient handles discovery of sub-paths automatically
             # We point it directly to the SSE endpoint which is standard for FastMCP
@@ -115,98 +345,82 @@ async def initialize_personas():
                 }
             )
             # Automatically discover all tools from the MCP server
-            mcp_tools = await client.get_tools()
+            mcp_tools = await asyncio.wait_for(client.get_tools(), timeout=MCP_DISCOVERY_TIMEOUT)
             if mcp_tools:
                 logger.info(f"Successfully loaded {len(mcp_tools)} tools from MCP server.")
                 break
+            logger.warning(f"Attempt {attempt + 1}: MCP server returned no tools.")
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Attempt {attempt + 1} timed out after {MCP_DISCOVERY_TIMEOUT}s loading MCP tools."
+            )
         except Exception as e:
-            logger.warning(f"Attempt {attempt + 1}/{max_retries} failed to load MCP tools: {e}")
-            if attempt < max_retries - 1:
-                await asyncio.sleep(retry_delay)
-            else:
-                logger.error("All attempts to load MCP tools failed.")
-
-    # Filter tools for specific personas
-    weight_mcp = [t for t in mcp_tools if any(word in t.name for word in ["weight", "data"])]
-    rust_mcp = [t for t in mcp_tools if "rust" in t.name]
-    cpp_mcp = [t for t in mcp_tools if "cpp" in t.name]
-    python_mcp = [t for t in mcp_tools if "python" in t.name]
-    history_mcp = [t for t in mcp_tools if "history" in t.name]
+            logger.warning(f"Attempt {attempt + 1} failed to load MCP tools: {e}")
+
+        delay = backoff_delay(attempt)
+        if time.monotonic() + delay > deadline:
+            logger.error(f"Giving up on MCP tools after {attempt + 1} attempts.")
+            break
+        attempt += 1
+        await asyncio.sleep(delay)
+
+    # Sort tools into persona buckets in a single pass
+    buckets = {category: [] for category in TOOL_CATEGORIES}
+    for t in mcp_tools:
+        name = t.name
+        for category, keywords in TOOL_CATEGORIES.items():
+            if any(word in name for word in keywords):
+                buckets[category].append(t)
 
     # Define Tool Sets
-    general_tools = [get_current_weather_london] + history_mcp
-    weight_tools = weight_mcp
-    rust_tools = rust_mcp
-    cpp_tools = cpp_mcp
-    python_tools = python_mcp
-
-    # Create Personas
-    personas["general"] = Persona(
-        name="General",
-        description="A helpful assistant for general queries, weather, and history.",
-        system_instructions=(
-            "You are a helpful AI assistant. When a user asks about historical events for today, you MUST: "
-            "1. Call these THREE tools: 'get_history_today', 'get_history_britannica', AND 'get_history_on_this_day'. "
-            "Do NOT skip any of them. Each provides unique events. "
-            "2. Combine and cross-reference the information from all 3 sources. "
-            "3. Provide ONLY the final summarized response organized into these sections: "
-            "   - 🌟 Featured Events "
-            "   - 📅 Other Notable Events "
-            "   - 👶 Notable Births "
-            "   - 🕯️ Notable Deaths "
-            "CRITICAL: Do not output your thinking process, internal monologues, or 'Wait, let me check' style commentary. "
-            "Return ONLY the final formatted summary with emojis. No meta-talk."
+    general_tools = [get_current_weather_london] + buckets["history"]
+    weight_tools = buckets["weight"]
+    rust_tools = buckets["rust"]
+    cpp_tools = buckets["cpp"]
+    python_tools = buckets["python"]
+
+    # Create Personas (agent construction is synchronous, so build them off-loop in parallel)
+    persona_configs = {
+        "general": dict(
+            name="General",
+            description="A helpful assistant for general queries, weather, and history.",
+            prompt=GENERAL_PROMPT,
+            tools=general_tools,
+            llm_model=llm,
         ),
-        tools=general_tools,
-        llm_model=llm
-    )
-    
-    personas["weight"] = Persona(
-        name="Weight Tracker",
-        description="Focused on tracking and visualizing weight loss progress.",
-        system_instructions=(
-            "You are a dedicated Weight Tracking Assistant. Help the user log their weight and view their progress. "
-            "If the user discusses unrelated topics, suggest switching to general mode."
+        "weight": dict(
+            name="Weight Tracker",
+            description="Focused on tracking and visualizing weight loss progress.",
+            prompt=WEIGHT_PROMPT,
+            tools=weight_tools,
+            llm_model=llm,
         ),
-        tools=weight_tools,
-        llm_model=llm
-    )
-    
-    personas["rust"] = Persona(
-        name="Rust Tutor",
-        description="An interactive Rust programming language tutor.",
-        system_instructions=(
-            "You are a Rust Programming Tutor (Crab Mode 🦀). Your goal is to teach the user Rust. "
-            "Explain concepts clearly with code examples. Be encouraging and use crab emojis! 🦀 "
-            "If the user asks about other topics, suggest switching to general mode."
+        "rust": dict(
+            name="Rust Tutor",
+            description="An interactive Rust programming language tutor.",
+            prompt=RUST_PROMPT,
+            tools=rust_tools,
+            llm_model=llm,
         ),
-        tools=rust_tools,
-        llm_model=llm
-    )
-
-    personas["cpp"] = Persona(
-        name="C++ Tutor",
-        description="An interactive C++ programming language tutor.",
-        system_instructions=(
-            "You are a C++ Programming Tutor. Your goal is to teach the user C++. "
-            "Explain concepts clearly with modern C++ examples (C++11 and later). Be precise and helpful. "
-            "If the user asks about other topics, suggest switching to general mode."
+        "cpp": dict(
+            name="C++ Tutor",
+            description="An interactive C++ programming language tutor.",
+            prompt=CPP_PROMPT,
+            tools=cpp_tools,
+            llm_model=llm,
         ),
-        tools=cpp_tools,
-        llm_model=llm
-    )
-
-    personas["python"] = Persona(
-        name="Python Tutor",
-        description="An interactive Python programming language tutor.",
-        system_instructions=(
-            "You are a Python Programming Tutor. Your goal is to teach the user Python. "
-            "Explain concepts clearly with idiomatic Python (Pythonic) examples. Be friendly and helpful. "
-            "If the user asks about other topics, suggest switching to general mode."
+        "python": dict(
+            name="Python Tutor",
+            description="An interactive Python programming language tutor.",
+            prompt=PYTHON_PROMPT,
+            tools=python_tools,
+            llm_model=llm,
         ),
-        tools=python_tools,
-        llm_model=llm
+    }
+    built = await asyncio.gather(
+        *(asyncio.to_thread(Persona, **cfg) for cfg in persona_configs.values())
     )
+    personas.update(zip(persona_configs.keys(), built))
     
     logger.info("Personas initialized successfully.")
 
@@ -1,18 +1,34 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 import aiohttp
+import asyncio
 import os
 import io
-import json
-import plotly.graph_objects as go
-import plotly.io as pio
-import pandas as pd
+import time
+import hashlib
+import types
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 import re
 import logging
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+import orjson
+import httpx
 from fastmcp import Client
+from mcp.shared.exceptions import McpError
 
 # Import from agent_logic
-from agent_logic import personas, initialize_personas, get_london_weather, logger
+from agent_logic import (
+    personas,
+    initialize_personas,
+    get_london_weather,
+    get_http_session,
+    close_http_session,
+    backoff_delay,
+    MCP_SERVER_URL,
+    logger,
+)
 
 # Configure logging
 # logging.basicConfig(level=logging.INFO) # Already configured in agent_logic if needed, but let's keep it here for bot.py specific
@@ -21,9 +37,22 @@ logger.setLevel(logging.INFO)
 # Environment variables
 DISCORD_TOKEN = os.environ.get("DISCORD_TOKEN")
 CHANNEL_ID = int(os.environ.get("DISCORD_CHANNEL_ID", "0"))
-
-# Weather code to human-readable description mapping
-WEATHER_CODES = {
+MCP_CALL_TIMEOUT = float(os.environ.get("MCP_CALL_TIMEOUT", "20"))
+MCP_CALL_RETRIES = 3
+DAILY_CHECK_TIME = os.environ.get("DAILY_CHECK_TIME", "09:00")
+try:
+    # Validated once here so a bad value can't kill the scheduler task later
+    _daily_check_at = datetime.strptime(DAILY_CHECK_TIME, "%H:%M")
+except ValueError:
+    logger.error(f"Invalid DAILY_CHECK_TIME {DAILY_CHECK_TIME!r} (expected HH:MM); using 09:00.")
+    DAILY_CHECK_TIME = "09:00"
+    _daily_check_at = datetime.strptime(DAILY_CHECK_TIME, "%H:%M")
+DAILY_CHECK_HOUR, DAILY_CHECK_MINUTE = _daily_check_at.hour, _daily_check_at.minute
+DAILY_CHECK_TZ = ZoneInfo(os.environ.get("DAILY_CHECK_TZ", "Europe/London"))
+WEATHER_FETCH_TIMEOUT = 10.0
+
+# Weather code to human-readable description mapping (read-only)
+WEATHER_CODES = types.MappingProxyType({
     0: "clear sky",
     1: "mainly clear",
     2: "partly cloudy",
@@ -52,17 +81,244 @@ WEATHER_CODES = {
     95: "thunderstorm",
     96: "thunderstorm with slight hail",
     99: "thunderstorm with heavy hail",
-}
+})
+# WMO codes are small ints (0-99): index a flat tuple instead of hashing
+_WEATHER_TABLE = tuple(WEATHER_CODES.get(i, "unknown conditions") for i in range(100))
+SUN_EMOJI_DAY = "🌞"
+SUN_EMOJI_NIGHT = "🌙"
+WEATHER_MSG_TEMPLATE = "{emoji} It's {temp}°C and {condition} in London."
 
 # Setup Intents
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix="!", intents=intents)
+
+
+class AssistantBot(commands.Bot):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Long-lived MCP connection shared by all commands
+        self.mcp_client: Client | None = None
+        self.daily_task: asyncio.Task | None = None
+        self.http_session: aiohttp.ClientSession | None = None
+        self.checkin_channel: discord.abc.Messageable | None = None
+
+    async def close(self):
+        """Release shared HTTP and MCP resources before disconnecting."""
+        if self.daily_task is not None:
+            self.daily_task.cancel()
+        await close_mcp_client()
+        await close_http_session()
+        await super().close()
+
+
+bot = AssistantBot(command_prefix="!", intents=intents)
+
+# --- MCP Client ---
+_mcp_connect_lock = asyncio.Lock()
+
+
+async def get_mcp_client() -> Client:
+    """Return the bot's MCP client, connecting on first use or after a drop."""
+    async with _mcp_connect_lock:
+        if bot.mcp_client is None or not bot.mcp_client.is_connected():
+            client = Client(MCP_SERVER_URL)
+            await client.__aenter__()
+            bot.mcp_client = client
+        return bot.mcp_client
+
+
+async def close_mcp_client():
+    """Close the shared MCP connection, if any."""
+    client, bot.mcp_client = bot.mcp_client, None
+    if client is not None:
+        try:
+            await client.__aexit__(None, None, None)
+        except Exception as e:
+            logger.warning(f"Error while closing MCP client: {e}")
+
+
+# Message fragments of the fastmcp Client RuntimeErrors raised before a call is
+# sent: the client was never connected, or connecting/initializing failed
+_CLIENT_CONNECTION_ERRORS = (
+    "not connected",
+    "failed to connect",
+    "failed to initialize server session",
+)
+
+
+def _is_connection_lost(e: Exception) -> bool:
+    """True if `e` means the MCP session is gone and the client must reconnect.
+
+    A restarted server answers the old session id with a 404, which surfaces as
+    McpError("Session terminated") while is_connected() still reports True.
+    Other RuntimeErrors may come after the server already ran the call, so only
+    the client's own pre-send connection errors are treated as retryable.
+    """
+    if isinstance(e, (ConnectionError, httpx.TransportError)):
+        return True
+    if isinstance(e, RuntimeError):
+        return any(phrase in str(e).lower() for phrase in _CLIENT_CONNECTION_ERRORS)
+    return isinstance(e, McpError) and "session terminated" in str(e).lower()
+
+
+async def call_mcp_tool(tool_name: str, arguments: dict):
+    """Call a tool on the MCP server over the shared connection.
+
+    Returns the tool result, or None if the call failed.
+    """
+    for attempt in range(MCP_CALL_RETRIES):
+        try:
+            client = await get_mcp_client()
+            return await asyncio.wait_for(
+                client.call_tool(tool_name, arguments), timeout=MCP_CALL_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"MCP tool {tool_name} timed out after {MCP_CALL_TIMEOUT}s")
+            return None
+        except Exception as e:
+            if not _is_connection_lost(e):
+                logger.error(f"MCP tool {tool_name} failed: {e}")
+                return None
+            # Connection dropped: back off and reconnect so a blip doesn't reach the user
+            logger.warning(
+                f"MCP connection error calling {tool_name} (attempt {attempt + 1}/{MCP_CALL_RETRIES}): {e}"
+            )
+            await close_mcp_client()
+            if attempt < MCP_CALL_RETRIES - 1:
+                await asyncio.sleep(backoff_delay(attempt, base=0.5, cap=5.0))
+    return None
+
+
+def _unwrap_mcp(data):
+    """Decode an MCP tool result into plain Python data.
+
+    Returns None when there is no result, the decoded JSON for JSON text
+    content, the raw text otherwise, and plain dicts/lists unchanged.
+    """
+    if data is None:
+        return None
+    content = getattr(data, "content", None)
+    if content is None:
+        return data if isinstance(data, (dict, list)) else None
+    if isinstance(content, list):
+        if not content:
+            return None
+        content = getattr(content[0], "text", None)
+        if content is None:
+            return None
+    try:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError:
+        return content
+
+
+def _mcp_ok(data) -> bool:
+    """True if a tool call returned a result that isn't flagged as an error."""
+    if not data:
+        return False
+    return not (getattr(data, "is_error", False) or getattr(data, "isError", False))
+
+
+# --- Weight Cache ---
+# Weight records (most recent first) as returned by get_weights. The series only
+# changes on !weight, !reset or a weight-agent turn, which all invalidate it; the
+# TTL covers writes from outside this process (e.g. the Gradio UI).
+WEIGHTS_CACHE_TTL = 300.0
+_weights_cache: list[dict] | None = None
+_weights_cache_at = 0.0
+_weights_cache_lock = asyncio.Lock()
+# Bumped on every invalidation, so a fetch that was in flight across one knows
+# its result may predate the change and doesn't store it
+_weights_cache_gen = 0
+
+
+async def get_cached_weights() -> list[dict] | None:
+    """Return all weight records, fetching from the MCP server only on a miss.
+
+    Returns None if the fetch failed, so callers can tell it apart from an
+    empty history.
+    """
+    global _weights_cache, _weights_cache_at
+    async with _weights_cache_lock:
+        now = time.monotonic()
+        if _weights_cache is None or now - _weights_cache_at > WEIGHTS_CACHE_TTL:
+            gen = _weights_cache_gen
+            data = await call_mcp_tool("get_weights", {})
+            if not _mcp_ok(data):
+                return None
+            records = _unwrap_mcp(data)
+            records = records if isinstance(records, list) else []
+            if gen != _weights_cache_gen:
+                return records
+            _weights_cache = records
+            _weights_cache_at = now
+        return _weights_cache
+
+
+def invalidate_weights_cache(records: list[dict] | None = None):
+    """Drop the cached weights, or replace them with `records` if given."""
+    global _weights_cache, _weights_cache_at, _weights_cache_gen
+    _weights_cache = records
+    _weights_cache_at = time.monotonic()
+    _weights_cache_gen += 1
+
 
 # --- User Mode Management ---
-user_modes = {}  # Format: {user_id: persona_name}
+# Format: {user_id: persona_name}, least recently set first; capped so a large
+# guild can't grow it without bound
+user_modes: OrderedDict[int, str] = OrderedDict()
+MAX_USER_MODES = 10_000
 DEFAULT_PERSONA = "general"
 
+
+def set_user_mode(user_id: int, persona_name: str):
+    """Remember a user's chosen persona, evicting the stalest entry when full."""
+    user_modes[user_id] = persona_name
+    user_modes.move_to_end(user_id)
+    if len(user_modes) > MAX_USER_MODES:
+        user_modes.popitem(last=False)
+
+# Keywords that route a message to a persona when the user hasn't picked a mode
+PERSONA_KEYWORDS = {
+    "weight": ("weight", "weigh", "weighed"),
+    "rust": ("rust",),
+    "cpp": ("c++", "cpp"),
+    "python": ("python",),
+}
+# All keywords compiled into one alternation (one named group per persona) so
+# routing is a single scan of the message regardless of persona count.
+_PERSONA_PATTERN = re.compile(
+    r"(?<!\w)(?:"
+    + "|".join(
+        f"(?P<{name}>{'|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True))})"
+        for name, words in PERSONA_KEYWORDS.items()
+    )
+    + r")(?!\w)",
+    re.IGNORECASE,
+)
+
+
+def route_persona(content: str) -> str:
+    """Pick a persona from the first keyword found in the message, else the default."""
+    match = _PERSONA_PATTERN.search(content)
+    return match.lastgroup if match else DEFAULT_PERSONA
+
+
+# Mode listings, rendered once personas are loaded (they don't change afterwards)
+_PERSONAS_LIST_STR = ""
+_MODES_HELP = ""
+
+
+def _refresh_mode_help():
+    """Pre-render the !mode / !modes listings from the loaded personas."""
+    global _PERSONAS_LIST_STR, _MODES_HELP
+    _PERSONAS_LIST_STR = ", ".join(personas.keys())
+    _MODES_HELP = (
+        "**Available Modes:**\n"
+        + "".join(f"• **{p_id}**: {p.description}\n" for p_id, p in personas.items())
+        + "\nUse `!mode <name>` to switch."
+    )
+
 @bot.command()
 async def mode(ctx, persona_name: str = None):
     """Switch your interaction mode (general, weight, rust)."""
@@ -72,26 +328,22 @@ async def mode(ctx, persona_name: str = None):
         if current not in personas:
             current = DEFAULT_PERSONA
         
-        await ctx.send(f"Current mode: **{current}**. Available modes: {', '.join(personas.keys())}.")
+        await ctx.send(f"Current mode: **{current}**. Available modes: {_PERSONAS_LIST_STR}.")
         return
 
     persona_name = persona_name.lower()
     if persona_name in personas:
-        user_modes[ctx.author.id] = persona_name
+        set_user_mode(ctx.author.id, persona_name)
         
         # Send a welcome message from the new persona
         await ctx.send(f"Switched to **{personas[persona_name].name}** mode. {personas[persona_name].description}")
     else:
-        await ctx.send(f"Unknown mode '{persona_name}'. Available modes: {', '.join(personas.keys())}")
+        await ctx.send(f"Unknown mode '{persona_name}'. Available modes: {_PERSONAS_LIST_STR}")
 
 @bot.command()
 async def modes(ctx):
     """List all available personas."""
-    msg = "**Available Modes:**\n"
-    for p_id, p in personas.items():
-        msg += f"• **{p_id}**: {p.description}\n"
-    msg += "\nUse `!mode <name>` to switch."
-    await ctx.send(msg)
+    await ctx.send(_MODES_HELP)
 
 # Global state for startup
 has_fired_startup_check = False
@@ -100,31 +352,80 @@ has_fired_startup_check = False
 async def on_ready():
     global has_fired_startup_check
     logger.info(f"Logged in as {bot.user} (ID: {bot.user.id})")
+
+    # Open the shared HTTP session up front so the first request reuses it
+    bot.http_session = await get_http_session()
+    bot.checkin_channel = bot.get_channel(CHANNEL_ID) if CHANNEL_ID else None
     
     # Initialize personas (load MCP tools)
     await initialize_personas()
+    _refresh_mode_help()
     
-    if not daily_check.is_running():
-        logger.info("Starting daily check-in loop...")
-        daily_check.start()
+    # on_ready fires again after reconnects; only start one scheduler
+    if bot.daily_task is None or bot.daily_task.done():
+        logger.info("Starting daily check-in scheduler...")
+        bot.daily_task = asyncio.create_task(daily_scheduler())
+
+
+@bot.event
+async def on_resumed():
+    # Channel objects can be replaced after a reconnect; refresh the cached one
+    bot.checkin_channel = bot.get_channel(CHANNEL_ID) if CHANNEL_ID else None
+
+
+def next_daily_check(now: datetime) -> datetime:
+    """Next occurrence of DAILY_CHECK_TIME strictly after `now` (same timezone)."""
+    target = now.replace(hour=DAILY_CHECK_HOUR, minute=DAILY_CHECK_MINUTE, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    return target
+
+
+async def daily_scheduler():
+    """Run daily_check at the configured wall-clock time every day.
+
+    Sleeping until the next computed target (instead of a fixed 24h interval)
+    keeps the send time from drifting by the duration of each run.
+    """
+    await bot.wait_until_ready()
+    while True:
+        try:
+            now = datetime.now(DAILY_CHECK_TZ)
+            target = next_daily_check(now)
+            logger.info(f"Next daily check-in scheduled for {target.isoformat()}")
+            # Compare timestamps so DST transitions don't skew the delay
+            await asyncio.sleep(max(0.0, target.timestamp() - now.timestamp()))
+            await daily_check()
+        except Exception as e:
+            logger.error(f"Daily check-in failed: {e}")
+            # Don't spin if the failure happens before the sleep
+            await asyncio.sleep(60)
 
 
-@tasks.loop(hours=24)
 async def daily_check():
     """Send daily check-in message."""
     logger.info(f"Executing daily_check. CHANNEL_ID: {CHANNEL_ID}")
     if CHANNEL_ID:
-        channel = bot.get_channel(CHANNEL_ID)
+        channel = bot.checkin_channel
+        if channel is None:
+            channel = bot.checkin_channel = bot.get_channel(CHANNEL_ID)
         if channel:
             logger.info(f"Found channel: {channel.name} (ID: {channel.id})")
-            weather = await get_london_weather()
+            try:
+                weather = await asyncio.wait_for(get_london_weather(bot.http_session), timeout=WEATHER_FETCH_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning(f"Weather fetch timed out after {WEATHER_FETCH_TIMEOUT}s.")
+                weather = None
             if weather:
                 temp = weather.get("temperature", "N/A")
                 code = weather.get("weathercode", 0)
-                condition = WEATHER_CODES.get(code, "unknown conditions")
+                condition = _WEATHER_TABLE[code] if 0 <= code < 100 else "unknown conditions"
                 is_day = weather.get("is_day", 1)
-                sun_emoji = "🌞" if is_day else "🌙"
-                weather_msg = f"{sun_emoji} It's {temp}°C and {condition} in London."
+                weather_msg = WEATHER_MSG_TEMPLATE.format(
+                    emoji=SUN_EMOJI_DAY if is_day else SUN_EMOJI_NIGHT,
+                    temp=temp,
+                    condition=condition,
+                )
             else:
                 logger.warning("Failed to fetch weather data.")
                 weather_msg = "Good morning!"
@@ -142,9 +443,58 @@ async def daily_check():
         logger.warning("CHANNEL_ID is not set (0). Skipping daily check-in.")
 
 
-@daily_check.before_loop
-async def before_daily_check():
-    await bot.wait_until_ready()
+CONFIRM_EMOJI = "✅"
+CONFIRM_TIMEOUT = 30.0
+
+
+async def confirm(ctx, prompt: str) -> bool:
+    """Ask the command author to confirm by reacting to the prompt.
+
+    Listens for reactions on the prompt message only, instead of running a
+    check over every message posted in the channel while we wait.
+    """
+    log_msg = f"{prompt} React with {CONFIRM_EMOJI} to confirm."
+    logger.info(f"Sent to {ctx.channel}: {log_msg}")
+    prompt_msg = await ctx.send(log_msg)
+    try:
+        await prompt_msg.add_reaction(CONFIRM_EMOJI)
+    except discord.HTTPException as e:
+        # No Add Reactions permission here (or the API refused): fall back to a typed reply
+        logger.warning(f"Could not add confirm reaction in {ctx.channel}: {e}")
+        return await confirm_by_reply(ctx)
+
+    def check(payload):
+        return (
+            payload.message_id == prompt_msg.id
+            and payload.user_id == ctx.author.id
+            and str(payload.emoji) == CONFIRM_EMOJI
+        )
+
+    try:
+        await bot.wait_for("raw_reaction_add", check=check, timeout=CONFIRM_TIMEOUT)
+    except asyncio.TimeoutError:
+        return False
+    return True
+
+
+async def confirm_by_reply(ctx) -> bool:
+    """Ask the command author to confirm by replying `yes`."""
+    log_msg = "I can't add reactions here, so reply with `yes` to confirm instead."
+    logger.info(f"Sent to {ctx.channel}: {log_msg}")
+    await ctx.send(log_msg)
+
+    def check(m):
+        return (
+            m.author == ctx.author
+            and m.channel == ctx.channel
+            and m.content.lower() == "yes"
+        )
+
+    try:
+        await bot.wait_for("message", check=check, timeout=CONFIRM_TIMEOUT)
+    except asyncio.TimeoutError:
+        return False
+    return True
 
 
 @bot.command()
@@ -152,7 +502,8 @@ async def weight(ctx, value: float, unit: str = "kg"):
     """Explicitly record weight via command."""
     response = await call_mcp_tool("record_weight", {"weight": value, "unit": unit})
     if response:
-        log_msg = str(response)
+        invalidate_weights_cache()
+        log_msg = str(_unwrap_mcp(response))
         logger.info(f"Sent to {ctx.channel}: {log_msg}")
         await ctx.send(log_msg)
     else:
@@ -164,28 +515,10 @@ async def weight(ctx, value: float, unit: str = "kg"):
 @bot.command()
 async def last(ctx):
     """Show the last recorded weight."""
-    data = await call_mcp_tool("get_last_weight", {})
-    if data and "error" not in str(data):
-        # Extract weight data from response
-        if hasattr(data, "content"):
-            # It's a TextContent object
-            import json
-
-            try:
-                weight_data = json.loads(
-                    data.content[0].text
-                    if isinstance(data.content, list)
-                    else data.content
-                )
-            except:
-                weight_data = data
-        else:
-            weight_data = data
-
-        if isinstance(weight_data, dict) and "weight" in weight_data:
-            log_msg = f"📅 Last recorded weight: **{weight_data['weight']} {weight_data['unit']}** on {weight_data['timestamp']}"
-        else:
-            log_msg = "No weight records found."
+    weights_data = await get_cached_weights()
+    weight_data = weights_data[0] if weights_data else None
+    if isinstance(weight_data, dict) and "weight" in weight_data:
+        log_msg = f"📅 Last recorded weight: **{weight_data['weight']} {weight_data['unit']}** on {weight_data['timestamp']}"
     else:
         log_msg = "No weight records found."
 
@@ -196,7 +529,7 @@ async def last(ctx):
 @bot.command()
 async def plot(ctx):
     """Show last 10 readings and progress graph."""
-    data = await call_mcp_tool("get_weights", {})
+    data = await get_cached_weights()
     if not data:
         log_msg = "No records found."
         logger.info(f"Sent to {ctx.channel}: {log_msg}")
@@ -209,20 +542,7 @@ async def plot(ctx):
 @bot.command()
 async def reset(ctx):
     """Delete all records."""
-    log_msg = "⚠️ Are you sure you want to delete ALL data? Reply with `yes` to confirm."
-    logger.info(f"Sent to {ctx.channel}: {log_msg}")
-    await ctx.send(log_msg)
-
-    def check(m):
-        return (
-            m.author == ctx.author
-            and m.channel == ctx.channel
-            and m.content.lower() == "yes"
-        )
-
-    try:
-        await bot.wait_for("message", check=check, timeout=30.0)
-    except TimeoutError:
+    if not await confirm(ctx, "⚠️ Are you sure you want to delete ALL data?"):
         log_msg = "Operations cancelled."
         logger.info(f"Sent to {ctx.channel}: {log_msg}")
         await ctx.send(log_msg)
@@ -230,7 +550,8 @@ async def reset(ctx):
 
     response = await call_mcp_tool("delete_all_weights", {})
     if response:
-        log_msg = str(response)
+        invalidate_weights_cache([])
+        log_msg = str(_unwrap_mcp(response))
         logger.info(f"Sent to {ctx.channel}: {log_msg}")
         await ctx.send(log_msg)
     else:
@@ -245,26 +566,11 @@ async def rust(ctx):
     if ctx.invoked_subcommand is None:
         # Show current progress by default
         data = await call_mcp_tool("get_rust_topic", {})
-        if data and "error" not in str(data):
-            # Parse the response
-            if hasattr(data, "content"):
-                try:
-                    topic_data = json.loads(
-                        data.content[0].text
-                        if isinstance(data.content, list)
-                        else data.content
-                    )
-                except:
-                    topic_data = {}
-            else:
-                topic_data = data if isinstance(data, dict) else {}
-
-            if topic_data.get("title"):
-                msg = f"🦀 You're on **Topic {topic_data.get('current_index', '?')} of {topic_data.get('total_topics', '?')}**: {topic_data.get('title')}\n"
-                msg += f"Section: {topic_data.get('section', 'unknown')}\n"
-                msg += "Say 'teach me some rust' to learn!"
-            else:
-                msg = "Use `!rust progress` to see your current topic, or `teach me some rust` to start learning!"
+        topic_data = _unwrap_mcp(data) if _mcp_ok(data) else None
+        if isinstance(topic_data, dict) and topic_data.get("title"):
+            msg = f"🦀 You're on **Topic {topic_data.get('current_index', '?')} of {topic_data.get('total_topics', '?')}**: {topic_data.get('title')}\n"
+            msg += f"Section: {topic_data.get('section', 'unknown')}\n"
+            msg += "Say 'teach me some rust' to learn!"
         else:
             msg = "Use `!rust progress` to see your current topic, or `teach me some rust` to start learning!"
         logger.info(f"Sent to {ctx.channel}: {msg}")
@@ -276,18 +582,9 @@ async def progress(ctx):
     """Show current Rust learning progress."""
     data = await call_mcp_tool("get_rust_topic", {})
     if data:
-        # Parse the response
-        if hasattr(data, "content"):
-            try:
-                topic_data = json.loads(
-                    data.content[0].text
-                    if isinstance(data.content, list)
-                    else data.content
-                )
-            except:
-                topic_data = {}
-        else:
-            topic_data = data if isinstance(data, dict) else {}
+        topic_data = _unwrap_mcp(data)
+        if not isinstance(topic_data, dict):
+            topic_data = {}
 
         if topic_data.get("error") == "All topics completed":
             msg = "🎉 Congratulations! You've completed all Rust topics!"
@@ -306,20 +603,7 @@ async def progress(ctx):
 @rust.command()
 async def restart(ctx):
     """Reset Rust learning progress to start over."""
-    log_msg = "⚠️ Are you sure you want to reset your Rust progress? Reply with `yes` to confirm."
-    logger.info(f"Sent to {ctx.channel}: {log_msg}")
-    await ctx.send(log_msg)
-
-    def check(m):
-        return (
-            m.author == ctx.author
-            and m.channel == ctx.channel
-            and m.content.lower() == "yes"
-        )
-
-    try:
-        await bot.wait_for("message", check=check, timeout=30.0)
-    except TimeoutError:
+    if not await confirm(ctx, "⚠️ Are you sure you want to reset your Rust progress?"):
         log_msg = "Reset cancelled."
         logger.info(f"Sent to {ctx.channel}: {log_msg}")
         await ctx.send(log_msg)
@@ -327,7 +611,7 @@ async def restart(ctx):
 
     response = await call_mcp_tool("reset_rust_progress", {})
     if response:
-        log_msg = f"🦀 {str(response)}"
+        log_msg = f"🦀 {_unwrap_mcp(response)}"
         logger.info(f"Sent to {ctx.channel}: {log_msg}")
         await ctx.send(log_msg)
     else:
@@ -336,10 +620,218 @@ async def restart(ctx):
         await ctx.send(log_msg)
 
 
+# Rendered progress charts keyed by a hash of the data they were drawn from,
+# so repeat !plot calls between new entries skip the render.
+_PLOT_CACHE: OrderedDict[bytes, bytes] = OrderedDict()
+_PLOT_CACHE_SIZE = 8
+# Renders still running, so concurrent !plot calls for the same data share one
+_RENDERS_IN_FLIGHT: dict[bytes, asyncio.Task] = {}
+_RENDER_SEMAPHORE = asyncio.Semaphore(2)
+PLOT_MAX_POINTS = 1000
+# "matplotlib" (default, in-process) or "plotly" (Kaleido/Chromium export)
+PLOT_BACKEND = os.environ.get("PLOT_BACKEND", "matplotlib").lower()
+
+# Static Plotly styling, built once instead of on every !plot
+_STATIC_TRACE = dict(
+    mode="lines+markers",
+    name="Weight",
+    line=dict(color="#00F0FF", width=4),
+    marker=dict(size=10, color="#FFFFFF", line=dict(width=2, color="#00F0FF")),
+    fill="tozeroy",
+    fillcolor="rgba(0, 240, 255, 0.1)",
+)
+_STATIC_LAYOUT = dict(
+    title="<b>Weight Loss Journey</b>",
+    title_font=dict(size=24, color="white", family="Arial"),
+    plot_bgcolor="rgba(0,0,0,0)",
+    paper_bgcolor="#1a1a1a",
+    xaxis=dict(
+        showgrid=True,
+        gridcolor="#333333",
+        tickfont=dict(color="#AAAAAA"),
+        linecolor="#333333",
+    ),
+    yaxis=dict(
+        showgrid=True,
+        gridcolor="#333333",
+        tickfont=dict(color="#AAAAAA"),
+        linecolor="#333333",
+        zeroline=False,
+    ),
+    margin=dict(l=40, r=40, t=60, b=40),
+    showlegend=False,
+)
+
+
+def _plot_cache_key(weights_data) -> bytes:
+    """Fingerprint of the fields the chart is drawn from.
+
+    Only (timestamp, weight, unit) feed the render, so unrelated fields
+    don't cause spurious misses.
+    """
+    rows = [(r.get("timestamp"), r.get("weight"), r.get("unit")) for r in weights_data]
+    return hashlib.blake2b(orjson.dumps(rows), digest_size=16).digest()
+
+
+def _lttb(xs, ys, n_out):
+    """Largest-Triangle-Three-Buckets downsampling of a series sorted by x.
+
+    `xs` must be numeric (e.g. POSIX timestamps). Returns the indices of the
+    points to keep; the first and last points are always kept.
+    """
+    n = len(xs)
+    if n_out >= n or n_out < 3:
+        return list(range(n))
+
+    kept = [0]
+    bucket_size = (n - 2) / (n_out - 2)
+    a = 0
+    for i in range(n_out - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        # The average of the next bucket is the third vertex of the triangle
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        count = next_end - end
+        avg_x = sum(xs[end:next_end]) / count
+        avg_y = sum(ys[end:next_end]) / count
+
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(best)
+        a = best
+    kept.append(n - 1)
+    return kept
+
+
+def _progress_series(weights_data):
+    """Sorted (and, for long histories, downsampled) x/y series for the chart."""
+    points = sorted(
+        ((datetime.fromisoformat(r["timestamp"]), r["weight"]) for r in weights_data),
+        key=lambda p: p[0],
+    )
+    # Past ~1000 points extra markers are invisible at chart width but still
+    # cost render time, so downsample long histories with LTTB.
+    if len(points) > PLOT_MAX_POINTS:
+        keep = _lttb([ts.timestamp() for ts, _ in points], [w for _, w in points], PLOT_MAX_POINTS)
+        points = [points[i] for i in keep]
+    x = [ts for ts, _ in points]
+    y = [w for _, w in points]
+    return x, y
+
+
+def _build_progress_figure(x, y) -> dict:
+    """Build the Plotly figure for the weight progress chart as a plain dict.
+
+    Skips graph_objects, whose per-attribute validators cost more than the
+    figure itself; the static styling is known-good.
+    """
+    return {
+        "data": [dict(type="scatter", x=x, y=y, **_STATIC_TRACE)],
+        "layout": _STATIC_LAYOUT,
+    }
+
+
+def _build_matplotlib_png(x, y) -> bytes:
+    """Render the progress chart with matplotlib's Agg backend.
+
+    Uses the object-oriented Figure API rather than pyplot, which keeps global
+    state and isn't safe to call from worker threads.
+    """
+    import matplotlib.dates as mdates
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 6), dpi=200, facecolor="#1a1a1a")
+    ax = fig.subplots()
+    ax.set_facecolor("#1a1a1a")
+    ax.plot(
+        x,
+        y,
+        "-o",
+        color="#00F0FF",
+        linewidth=3,
+        markersize=7,
+        markerfacecolor="#FFFFFF",
+        markeredgecolor="#00F0FF",
+        markeredgewidth=1.5,
+    )
+    ax.fill_between(x, y, color="#00F0FF", alpha=0.1)
+    ax.set_title("Weight Loss Journey", color="white", fontsize=20, fontweight="bold")
+    ax.grid(True, color="#333333")
+    ax.tick_params(colors="#AAAAAA")
+    for spine in ax.spines.values():
+        spine.set_color("#333333")
+    locator = mdates.AutoDateLocator()
+    ax.xaxis.set_major_locator(locator)
+    ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", facecolor=fig.get_facecolor(), bbox_inches="tight")
+    return buf.getvalue()
+
+
+def _build_png(weights_data) -> bytes:
+    """Build and export the progress chart. Blocking: run in a worker thread."""
+    x, y = _progress_series(weights_data)
+    if PLOT_BACKEND == "plotly":
+        import plotly.io as pio
+
+        fig = _build_progress_figure(x, y)
+        return pio.to_image(
+            fig, format="png", width=1000, height=600, scale=2, validate=False
+        )
+    return _build_matplotlib_png(x, y)
+
+
+async def _render_progress_png(weights_data) -> bytes:
+    """Render the weight progress chart as PNG bytes.
+
+    Parsing, sorting, figure construction and the PNG export all run in a
+    worker thread so the event loop stays free; the semaphore caps how many
+    renders (and Kaleido processes, on the plotly backend) run at once.
+    """
+    async with _RENDER_SEMAPHORE:
+        return await asyncio.to_thread(_build_png, weights_data)
+
+
+def _finish_render(key: bytes, task: asyncio.Task):
+    """Move a finished render from the in-flight table into the PNG cache."""
+    _RENDERS_IN_FLIGHT.pop(key, None)
+    if task.cancelled() or task.exception() is not None:
+        return
+    _PLOT_CACHE[key] = task.result()
+    if len(_PLOT_CACHE) > _PLOT_CACHE_SIZE:
+        _PLOT_CACHE.popitem(last=False)
+
+
+async def _get_progress_png(weights_data) -> bytes:
+    """Return the progress chart PNG, rendering each distinct dataset once.
+
+    Finished charts come from the LRU cache; callers arriving while the same
+    chart is still rendering await that render instead of starting another.
+    """
+    key = _plot_cache_key(weights_data)
+    img_bytes = _PLOT_CACHE.get(key)
+    if img_bytes is not None:
+        _PLOT_CACHE.move_to_end(key)
+        return img_bytes
+
+    task = _RENDERS_IN_FLIGHT.get(key)
+    if task is None:
+        task = asyncio.create_task(_render_progress_png(weights_data))
+        _RENDERS_IN_FLIGHT[key] = task
+        task.add_done_callback(lambda t: _finish_render(key, t))
+    # Shielded so one caller giving up doesn't cancel the render for the others
+    return await asyncio.shield(task)
+
+
 async def send_full_report(channel, data=None):
     """Send weight progress report with graph."""
     if data is None:
-        data = await call_mcp_tool("get_weights", {})
+        data = await get_cached_weights()
 
     if not data:
         log_msg = "No data to report!"
@@ -348,17 +840,7 @@ async def send_full_report(channel, data=None):
         return
 
     # Parse data if it's a tool result
-    if hasattr(data, "content"):
-        import json
-
-        try:
-            weights_data = json.loads(
-                data.content[0].text if isinstance(data.content, list) else data.content
-            )
-        except:
-            weights_data = data
-    else:
-        weights_data = data
+    weights_data = _unwrap_mcp(data)
 
     if isinstance(weights_data, list):
         recent_data = weights_data[:10]
@@ -369,73 +851,65 @@ async def send_full_report(channel, data=None):
     for record in recent_data:
         if isinstance(record, dict):
             try:
-                ts = pd.to_datetime(record["timestamp"])
+                ts = datetime.fromisoformat(record["timestamp"])
                 date_str = ts.strftime("%Y-%m-%d %H:%M")
-            except:
+            except (KeyError, TypeError, ValueError):
                 date_str = record.get("timestamp", "unknown")
             msg_lines.append(
                 f"• {record.get('weight', 'N/A')} {record.get('unit', 'kg')} on {date_str}"
             )
 
-    await channel.send("\n".join(msg_lines))
+    msg_lines.append("\nKeep it up! 💪")
+    log_msg = "\n".join(msg_lines)
 
     # Create Plot - only if we have valid data
+    chart = None
     if weights_data and isinstance(weights_data, list):
         try:
-            df = pd.DataFrame(weights_data)
-            df["timestamp"] = pd.to_datetime(df["timestamp"])
-            df = df.sort_values("timestamp")
-
-            fig = go.Figure()
-            fig.add_trace(
-                go.Scatter(
-                    x=df["timestamp"],
-                    y=df["weight"],
-                    mode="lines+markers",
-                    name="Weight",
-                    line=dict(color="#00F0FF", width=4),
-                    marker=dict(
-                        size=10, color="#FFFFFF", line=dict(width=2, color="#00F0FF")
-                    ),
-                    fill="tozeroy",
-                    fillcolor="rgba(0, 240, 255, 0.1)",
-                )
-            )
-
-            fig.update_layout(
-                title="<b>Weight Loss Journey</b>",
-                title_font=dict(size=24, color="white", family="Arial"),
-                plot_bgcolor="rgba(0,0,0,0)",
-                paper_bgcolor="#1a1a1a",
-                xaxis=dict(
-                    showgrid=True,
-                    gridcolor="#333333",
-                    tickfont=dict(color="#AAAAAA"),
-                    linecolor="#333333",
-                ),
-                yaxis=dict(
-                    showgrid=True,
-                    gridcolor="#333333",
-                    tickfont=dict(color="#AAAAAA"),
-                    linecolor="#333333",
-                    zeroline=False,
-                ),
-                margin=dict(l=40, r=40, t=60, b=40),
-                showlegend=False,
-            )
-
-            img_bytes = pio.to_image(fig, format="png", width=1000, height=600, scale=2)
-            buf = io.BytesIO(img_bytes)
-            buf.seek(0)
-
-            logger.info(f"Sent graph to {channel}")
-            await channel.send(file=discord.File(buf, filename="progress.png"))
+            img_bytes = await _get_progress_png(weights_data)
+            chart = discord.File(io.BytesIO(img_bytes), filename="progress.png")
         except Exception as e:
             logger.error(f"Failed to create graph: {e}")
 
-    log_msg = "Keep it up! 💪"
+    # Readings and chart go out as one message when the text fits
     logger.info(f"Sent to {channel}: {log_msg}")
-    await channel.send(log_msg)
+    if chart is None:
+        await send_long_message(channel, log_msg)
+    elif len(log_msg) <= 2000:
+        logger.info(f"Sent graph to {channel}")
+        await channel.send(content=log_msg, file=chart)
+    else:
+        await send_long_message(channel, log_msg)
+        logger.info(f"Sent graph to {channel}")
+        await channel.send(file=chart)
+
+
+def _split_message(content: str, limit: int) -> list[str]:
+    """Split content into chunks of at most `limit` characters.
+
+    Prefers breaking at the last newline that fits, then at the last space,
+    and only hard-cuts when neither exists. Chunks are slices of the original
+    string, so this is a single linear pass with no intermediate concatenation.
+    """
+    chunks = []
+    start = 0
+    length = len(content)
+    while length - start > limit:
+        window_end = start + limit
+        cut = content.rfind("\n", start, window_end + 1)
+        if cut <= start:
+            cut = content.rfind(" ", start, window_end + 1)
+        if cut <= start:
+            # No whitespace to break on: hard cut
+            chunks.append(content[start:window_end])
+            start = window_end
+            continue
+        chunks.append(content[start:cut])
+        start = cut + 1  # drop the separator we broke on
+    if start < length:
+        chunks.append(content[start:])
+    # Discord rejects empty / whitespace-only messages
+    return [chunk for chunk in chunks if chunk.strip()]
 
 
 async def send_long_message(channel, content: str, max_length: int = 2000):
@@ -444,38 +918,32 @@ async def send_long_message(channel, content: str, max_length: int = 2000):
         await channel.send(content)
         return
 
-    # Split by newlines first, then by space if needed
-    lines = content.split('\n')
-    chunks = []
-    current_chunk = ""
-
-    for line in lines:
-        # If adding this line would exceed limit
-        if len(current_chunk) + len(line) + 1 > max_length:
-            if current_chunk:
-                chunks.append(current_chunk)
-                current_chunk = ""
-
-            # If a single line is too long, split by words
-            if len(line) > max_length:
-                words = line.split(' ')
-                for word in words:
-                    if len(current_chunk) + len(word) + 1 > max_length:
-                        if current_chunk:
-                            chunks.append(current_chunk)
-                        current_chunk = word
-                    else:
-                        current_chunk = current_chunk + " " + word if current_chunk else word
-            else:
-                current_chunk = line
-        else:
-            current_chunk = current_chunk + "\n" + line if current_chunk else line
+    for chunk in _split_message(content, max_length):
+        await channel.send(chunk)
 
-    if current_chunk:
-        chunks.append(current_chunk)
 
-    for chunk in chunks:
-        await channel.send(chunk)
+# Agent turns: FIFO per channel, and at most AGENT_CONCURRENCY LLM calls at once
+AGENT_CONCURRENCY = 4
+_agent_semaphore = asyncio.Semaphore(AGENT_CONCURRENCY)
+# channel id -> [lock, number of turns holding or waiting on it]; an entry is
+# dropped when its last turn finishes, so idle channels don't accumulate locks
+_channel_locks: dict[int, list] = {}
+
+
+@asynccontextmanager
+async def channel_turn(channel_id: int):
+    """Hold the channel's FIFO lock for one agent turn."""
+    entry = _channel_locks.get(channel_id)
+    if entry is None:
+        entry = _channel_locks[channel_id] = [asyncio.Lock(), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _channel_locks[channel_id]
 
 
 @bot.event
@@ -483,36 +951,54 @@ async def on_message(message):
     if message.author == bot.user:
         return
 
-    logger.info(f"Received message: {message.content} from {message.author}")
+    content = message.content
+    # Lazy %-formatting: message.author is only stringified if INFO is enabled
+    logger.info("Received message: %s from %s", content, message.author)
 
-    # Process commands first
-    await bot.process_commands(message)
-    if message.content.startswith("!"):
+    # Commands never reach the agent, so dispatch them and stop here
+    if content.startswith("!"):
+        await bot.process_commands(message)
         return
 
-    # Determine user's persona
-    user_persona_name = user_modes.get(message.author.id, DEFAULT_PERSONA)
-    # Check if persona exists, otherwise fallback to default
-    if user_persona_name not in personas:
+    # Determine user's persona: an explicit !mode wins, otherwise route by keyword
+    user_persona_name = user_modes.get(message.author.id) or route_persona(content)
+    # Fall back to the default if the persona doesn't exist
+    persona = personas.get(user_persona_name)
+    if persona is None:
         user_persona_name = DEFAULT_PERSONA
-    
-    user_agent_executor = personas[user_persona_name].executor
+        persona = personas[DEFAULT_PERSONA]
+    user_agent_executor = persona.executor
 
-    # Use LangChain Agent
-    try:
-        response = await user_agent_executor.ainvoke({"input": message.content})
-        output = response.get("output")
-        if output:
-            await send_long_message(message.channel, output)
-    except Exception as e:
-        logger.error(f"Agent error for persona {user_persona_name}: {e}")
-        await message.channel.send(
-            "I'm having a bit of trouble thinking right now. Please try again."
-        )
+    # Use LangChain Agent. Replies within a channel keep message order, while
+    # different channels run concurrently up to the global agent cap.
+    async with channel_turn(message.channel.id):
+        try:
+            async with _agent_semaphore, message.channel.typing():
+                response = await user_agent_executor.ainvoke({"input": content})
+            if user_persona_name == "weight":
+                # The weight agent may have recorded or deleted entries via its tools
+                invalidate_weights_cache()
+            output = response.get("output")
+            if output:
+                await send_long_message(message.channel, output)
+        except Exception as e:
+            logger.error(f"Agent error for persona {user_persona_name}: {e}")
+            await message.channel.send(
+                "I'm having a bit of trouble thinking right now. Please try again."
+            )
 
 
 if __name__ == "__main__":
     if not DISCORD_TOKEN:
         print("Error: DISCORD_TOKEN not found.")
     else:
+        # uvloop is optional (not available on Windows); bot.run creates its
+        # loop from the policy, so this must happen first
+        try:
+            import uvloop
+
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+            logger.info("Using uvloop event loop.")
+        except ImportError:
+            pass
         bot.run(DISCORD_TOKEN)
@@ -1,11 +1,28 @@
 import gradio as gr
 import asyncio
 import os
+import threading
 from dotenv import load_dotenv
 from agent_logic import personas, initialize_personas, logger
 
 # ... (rest of the imports)
 
+# One long-lived event loop for all chat turns, so agent clients and HTTP
+# sessions bound to it are reused instead of rebuilt per message
+_loop = asyncio.new_event_loop()
+threading.Thread(target=_loop.run_forever, name="agent-loop", daemon=True).start()
+
+AVAILABLE_PERSONAS = ("general", "weight", "rust", "cpp", "python")
+DEFAULT_PERSONA = "general"
+CHAT_EXAMPLES = (
+    ("What is the weather in London?", "general"),
+    ("I weigh 75 kg", "weight"),
+    ("Tell me about Rust", "rust"),
+    ("Teach me some C++", "cpp"),
+    ("How do I use lists in Python?", "python"),
+    ("What happened today in history?", "general"),
+)
+
 async def chat_response(message, history, persona_name):
     """Handle chat messages through the selected agent persona."""
     # Ensure personas are initialized
@@ -13,7 +30,7 @@ async def chat_response(message, history, persona_name):
         await initialize_personas()
     
     if persona_name not in personas:
-        persona_name = "general"
+        persona_name = DEFAULT_PERSONA
     
     agent_executor = personas[persona_name].executor
     
@@ -27,17 +44,19 @@ async def chat_response(message, history, persona_name):
 
 def predict(message, history, persona_name):
     """Bridge sync Gradio to async chat logic."""
-    return asyncio.run(chat_response(message, history, persona_name))
+    return asyncio.run_coroutine_threadsafe(
+        chat_response(message, history, persona_name), _loop
+    ).result()
 
 # Create Gradio Interface
-with gr.Blocks(title="Discord Bot Test Interface") as demo:
+with gr.Blocks(title="Discord Bot Test Interface", analytics_enabled=False) as demo:
     gr.Markdown("# 🤖 Bot Test Interface")
     gr.Markdown("Test the bot's personas and tools without needing Discord.")
     
     with gr.Row():
         persona_selector = gr.Dropdown(
-            choices=["general", "weight", "rust", "cpp", "python"],
-            value="general",
+            choices=AVAILABLE_PERSONAS,
+            value=DEFAULT_PERSONA,
             label="Select Persona",
             interactive=True
         )
@@ -45,14 +64,7 @@ with gr.Blocks(title="Discord Bot Test Interface") as demo:
     chatbot = gr.ChatInterface(
         fn=predict,
         additional_inputs=[persona_selector],
-        examples=[
-            ["What is the weather in London?", "general"],
-            ["I weigh 75 kg", "weight"],
-            ["Tell me about Rust", "rust"],
-            ["Teach me some C++", "cpp"],
-            ["How do I use lists in Python?", "python"],
-            ["What happened today in history?", "general"]
-        ],
+        examples=[list(example) for example in CHAT_EXAMPLES],
         cache_examples=False,
     )
 
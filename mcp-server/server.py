@@ -1,63 +1,229 @@
 from fastmcp import FastMCP
+import asyncio
+import functools
 import os
-import json
+import re
+import orjson
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import List, Dict, Any, Optional
-import requests
-from bs4 import BeautifulSoup
-from pymongo import MongoClient
+import aiohttp
+from bs4 import BeautifulSoup, SoupStrainer
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-mcp = FastMCP("Weight Tracker MCP Server")
+
+# Some fastmcp releases enter the lifespan once per client session rather than
+# once per server, and the agent opens a session per tool call. So the database
+# is prepared only on first entry, and the scraper session is closed only when
+# no session is still open. The Motor client is never closed here: pymongo can't
+# reuse a closed client, and the process exit tears it down.
+_db_ready = False
+_open_sessions = 0
+
+
+@asynccontextmanager
+async def lifespan(server):
+    """Set up the database once; close the HTTP session after the last exit."""
+    global _db_ready, _open_sessions
+    if not _db_ready:
+        _db_ready = True
+        await init_db()
+    _open_sessions += 1
+    try:
+        yield
+    finally:
+        _open_sessions -= 1
+        if _open_sessions == 0:
+            await close_http_session()
+
+
+mcp = FastMCP("Weight Tracker MCP Server", lifespan=lifespan)
 
 MONGO_URI = os.environ.get("MONGO_URI", "mongodb://mongodb:27017/bot_db")
 CURRICULUM_PATH = os.environ.get("CURRICULUM_PATH", "data/rust_curriculum.json")
+# Display names for the curricula in data/; each gets get/advance/reset tools
+LANGUAGES = {"rust": "Rust", "cpp": "C++", "python": "Python"}
 
 # Initialize MongoDB client
-# We use a lazy initialization or a global client
-client = MongoClient(MONGO_URI)
+# Motor keeps DB round trips off the event loop the tools are served from
+client = AsyncIOMotorClient(
+    MONGO_URI,
+    maxPoolSize=20,
+    minPoolSize=5,
+    serverSelectionTimeoutMS=5000,
+    socketTimeoutMS=10000,
+    waitQueueTimeoutMS=2000,
+)
 db = client.get_database()
 weights_col = db["weights"]
 learning_progress_col = db["learning_progress"]
 
 
-def init_db():
+async def init_db():
     try:
-        # Initialize learning_progress for each language if it doesn't exist
-        languages = ["rust", "cpp", "python"]
-        for lang in languages:
-            if learning_progress_col.count_documents({"_id": f"{lang}_progress"}) == 0:
-                learning_progress_col.insert_one({
-                    "_id": f"{lang}_progress",
-                    "language": lang,
-                    "current_topic_index": 0,
-                    "updated_at": datetime.utcnow()
-                })
+        # Connect now so the first tool call doesn't pay the handshake
+        await client.admin.command("ping")
+        # Initialize learning_progress for each language if it doesn't exist,
+        # as one batch of upserts instead of a count + insert per language
+        now = datetime.utcnow()
+        await learning_progress_col.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": f"{lang}_progress"},
+                    {"$setOnInsert": {"language": lang, "current_topic_index": 0, "updated_at": now}},
+                    upsert=True,
+                )
+                for lang in LANGUAGES
+            ],
+            ordered=False,
+        )
+        # Serves the timestamp sort in get_weights/get_last_weight as an index
+        # walk instead of a collection scan + in-memory sort (no-op if present)
+        await weights_col.create_index([("timestamp", -1)])
         logger.info("MongoDB collections initialized.")
     except Exception as e:
         logger.error(f"Failed to initialize MongoDB: {e}")
 
 
+@functools.lru_cache(maxsize=8)
+def _read_curriculum(path: str, mtime_ns: int) -> List[Dict[str, Any]]:
+    """Parse a curriculum file; cached per (path, mtime) so edits are picked up."""
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
+
 def load_curriculum(language: str) -> List[Dict[str, Any]]:
     """Load the curriculum for a specific language from JSON file."""
     path = f"data/{language}_curriculum.json"
     try:
-        with open(path, 'r') as f:
-            return json.load(f)
+        return _read_curriculum(path, os.stat(path).st_mtime_ns)
     except FileNotFoundError:
         logger.error(f"Curriculum not found for {language} at {path}")
         return []
+    except orjson.JSONDecodeError as e:
+        logger.error(f"Invalid curriculum JSON for {language} at {path}: {e}")
+        return []
+
 
+# libxml2-backed parser; several times faster than the pure-Python html.parser
+HTML_PARSER = "lxml"
 
-init_db()
+
+def _class_pattern(*names: str) -> re.Pattern:
+    """Match a class attribute containing any of `names` as a whole class.
+
+    SoupStrainer sees the raw (possibly multi-class) attribute string while
+    parsing, so plain string/list filters would miss e.g. "card otd-featured-event".
+    """
+    return re.compile(r"(?:^|\s)(?:%s)(?:\s|$)" % "|".join(map(re.escape, names)))
+
+
+# Only the containers each scraper reads get built into the tree; matched tags
+# keep their whole subtree, so lookups inside them behave as on the full page
+_BRITANNICA_STRAINER = SoupStrainer(
+    "div", class_=_class_pattern("otd-featured-event", "md-history-event", "md-history-born")
+)
+_WIKIPEDIA_STRAINER = SoupStrainer("div", class_=_class_pattern("mw-parser-output"))
+_ONTHISDAY_STRAINER = SoupStrainer("ul", class_=_class_pattern("event-list", "photo-list"))
+
+# Shared HTTP session for the scraping tools, so calls reuse pooled keep-alive
+# connections instead of opening a new TCP/TLS connection per fetch. aiohttp
+# sends Accept-Encoding itself (gzip/deflate, plus br with Brotli installed) and
+# decodes the compressed body transparently.
+BROWSER_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+_http_session: Optional[aiohttp.ClientSession] = None
+_http_session_lock = asyncio.Lock()
+
+
+async def _get_session() -> aiohttp.ClientSession:
+    """Return the shared HTTP session, creating it on first use."""
+    global _http_session
+    async with _http_session_lock:
+        if _http_session is None or _http_session.closed:
+            _http_session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=10),
+                connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300),
+                headers={"User-Agent": BROWSER_USER_AGENT},
+            )
+        return _http_session
+
+
+async def close_http_session():
+    """Close the shared HTTP session, if one was opened."""
+    global _http_session
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+
+
+async def _fetch_html(url: str, headers: Optional[Dict[str, str]] = None) -> bytes:
+    """GET a page over the shared session and return its raw body.
+
+    Bytes go straight to the parser, which handles the charset itself, so the
+    page is never also materialized as a decoded str.
+    """
+    session = await _get_session()
+    async with session.get(url, headers=headers) as response:
+        response.raise_for_status()
+        return await response.read()
+
+
+# Scraped history only changes once a day: keep each source's formatted result
+# keyed by (scraper, date) and serve repeats without fetching or parsing
+_history_cache: Dict[tuple, str] = {}
+# One lock per cache key, so concurrent callers on a cold cache (e.g.
+# get_history_all alongside a single-source tool) share one scrape
+_history_locks: Dict[tuple, asyncio.Lock] = {}
+
+
+def _cached_for_today(fetch):
+    """Memoize a history scraper's successful result for the rest of the day."""
+    @functools.wraps(fetch)
+    async def wrapper() -> str:
+        today = datetime.now().date()
+        key = (fetch.__name__, today)
+        cached = _history_cache.get(key)
+        if cached is not None:
+            return cached
+        async with _history_locks.setdefault(key, asyncio.Lock()):
+            # Another caller may have filled the cache while we waited
+            cached = _history_cache.get(key)
+            if cached is not None:
+                return cached
+            result = await fetch()
+            # Only real fact lists (which open with a "--- SOURCE ---" header) are
+            # kept; errors and transient "No ... facts found." pages are retried
+            if result.startswith("--- "):
+                for stale in [k for k in _history_locks if k[1] != today]:
+                    _history_locks.pop(stale, None)
+                    _history_cache.pop(stale, None)
+                _history_cache[key] = result
+            return result
+    return wrapper
+
+
+# Weight records as returned to clients: the server formats timestamps as ISO
+# strings (naive UTC, millisecond precision) so no per-document rewrite is needed
+_WEIGHT_PROJECTION = {
+    "$project": {
+        "_id": 0,
+        "weight": 1,
+        "unit": 1,
+        "timestamp": {"$dateToString": {"date": "$timestamp", "format": "%Y-%m-%dT%H:%M:%S.%L"}},
+    }
+}
 
 
 @mcp.tool
-def record_weight(weight: float, unit: str = "kg") -> str:
+async def record_weight(weight: float, unit: str = "kg") -> str:
     """Record a new weight entry for the user. Unit should be 'kg' or 'lbs'.
 
     Args:
@@ -67,63 +233,70 @@ def record_weight(weight: float, unit: str = "kg") -> str:
     Returns:
         Confirmation message with recorded weight
     """
-    entry = {
-        "weight": weight,
-        "unit": unit,
-        "timestamp": datetime.utcnow()
-    }
-    weights_col.insert_one(entry)
+    # Pipeline upsert on a fresh _id: one round trip, and the timestamp comes
+    # from the server clock ($$NOW) instead of the tool process. User values are
+    # wrapped in $literal so a unit like "$foo" isn't evaluated as a field path.
+    await weights_col.update_one(
+        {"_id": ObjectId()},
+        [{"$set": {
+            "weight": {"$literal": weight},
+            "unit": {"$literal": unit},
+            "timestamp": "$$NOW",
+        }}],
+        upsert=True,
+    )
     return f"✅ Recorded: {weight} {unit}"
 
 
 @mcp.tool
-def get_weights() -> List[Dict[str, Any]]:
+async def get_weights() -> List[Dict[str, Any]]:
     """Get all weight records ordered by timestamp (most recent first).
 
     Returns:
         List of weight records with weight, unit, and timestamp
     """
-    cursor = weights_col.find({}, {"_id": 0}).sort("timestamp", -1)
-    results = list(cursor)
-    for r in results:
-        if isinstance(r.get("timestamp"), datetime):
-            r["timestamp"] = r["timestamp"].isoformat()
-    return results
+    cursor = weights_col.aggregate([{"$sort": {"timestamp": -1}}, _WEIGHT_PROJECTION])
+    return await cursor.to_list(length=None)
 
 
 @mcp.tool
-def get_last_weight() -> Dict[str, Any]:
+async def get_last_weight() -> Dict[str, Any]:
     """Get the most recent weight record.
 
     Returns:
         The last weight record with weight, unit, and timestamp
     """
-    last = weights_col.find_one({}, {"_id": 0}, sort=[("timestamp", -1)])
+    cursor = weights_col.aggregate(
+        [{"$sort": {"timestamp": -1}}, {"$limit": 1}, _WEIGHT_PROJECTION]
+    )
+    last = await cursor.to_list(length=1)
     if last:
-        if isinstance(last.get("timestamp"), datetime):
-            last["timestamp"] = last["timestamp"].isoformat()
-        return last
+        return last[0]
     return {"error": "No weight records found"}
 
 
 @mcp.tool
-def delete_all_weights() -> str:
+async def delete_all_weights() -> str:
     """Delete all weight records. Use with caution!
 
     Returns:
         Confirmation message with number of deleted records
     """
-    result = weights_col.delete_many({})
+    result = await weights_col.delete_many({})
     return f"Deleted {result.deleted_count} records"
 
 
-def _get_topic(language: str) -> Dict[str, Any]:
+async def _get_topic(language: str) -> Dict[str, Any]:
     """Internal helper to get the current topic for a language."""
-    curriculum = load_curriculum(language)
+    # The file read (a stat when cached) and the progress lookup are
+    # independent, so overlap them instead of waiting on each in turn
+    curriculum, progress = await asyncio.gather(
+        asyncio.to_thread(load_curriculum, language),
+        learning_progress_col.find_one({"_id": f"{language}_progress"}),
+    )
     if not curriculum:
         return {"error": f"{language.capitalize()} curriculum not found"}
 
-    progress = learning_progress_col.find_one({"_id": f"{language}_progress"})
     current_index = progress["current_topic_index"] if progress else 0
 
     if current_index >= len(curriculum):
@@ -148,28 +321,36 @@ def _get_topic(language: str) -> Dict[str, Any]:
     }
 
 
-def _advance_topic(language: str) -> Dict[str, Any]:
+async def _advance_topic(language: str) -> Dict[str, Any]:
     """Internal helper to advance the topic for a language."""
-    curriculum = load_curriculum(language)
+    curriculum = await asyncio.to_thread(load_curriculum, language)
     if not curriculum:
         return {"error": f"{language.capitalize()} curriculum not found"}
 
-    progress = learning_progress_col.find_one({"_id": f"{language}_progress"})
-    current_index = progress["current_topic_index"] if progress else 0
-
-    if current_index >= len(curriculum):
+    # Increment only while there are topics left, in one atomic round trip.
+    # No match means the progress doc is already at the end, so the upsert
+    # collides with the existing _id.
+    try:
+        progress = await learning_progress_col.find_one_and_update(
+            {"_id": f"{language}_progress", "current_topic_index": {"$lt": len(curriculum)}},
+            {
+                "$inc": {"current_topic_index": 1},
+                "$currentDate": {"updated_at": True},
+                "$setOnInsert": {"language": language},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        progress = await learning_progress_col.find_one({"_id": f"{language}_progress"})
         return {
             "error": "All topics completed",
             "language": language,
-            "current_index": current_index,
+            "current_index": progress["current_topic_index"] if progress else len(curriculum),
             "total_topics": len(curriculum)
         }
 
-    new_index = current_index + 1
-    learning_progress_col.update_one(
-        {"_id": f"{language}_progress"},
-        {"$set": {"current_topic_index": new_index, "updated_at": datetime.utcnow()}}
-    )
+    new_index = progress["current_topic_index"]
 
     if new_index >= len(curriculum):
         return {
@@ -193,200 +374,226 @@ def _advance_topic(language: str) -> Dict[str, Any]:
     }
 
 
-def _reset_progress(language: str) -> str:
+async def _reset_progress(language: str) -> str:
     """Internal helper to reset progress for a language."""
-    learning_progress_col.update_one(
+    await learning_progress_col.update_one(
         {"_id": f"{language}_progress"},
-        {"$set": {"current_topic_index": 0, "updated_at": datetime.utcnow()}}
+        {"$set": {"current_topic_index": 0}, "$currentDate": {"updated_at": True}}
     )
     return f"{language.capitalize()} progress successfully reset. Ready to start fresh!"
 
 
-# --- Rust Tools ---
-@mcp.tool
-def get_rust_topic() -> Dict[str, Any]:
-    """Get the current Rust topic the user is learning."""
-    return _get_topic("rust")
+# --- Language Tools ---
+def _register_language_tools(language: str, label: str):
+    """Register the get_/advance_/reset_ tools for one language's curriculum."""
+    async def get_topic() -> Dict[str, Any]:
+        return await _get_topic(language)
 
+    async def advance_topic() -> Dict[str, Any]:
+        return await _advance_topic(language)
 
-@mcp.tool
-def advance_rust_topic() -> Dict[str, Any]:
-    """Advance to the next Rust topic and return it."""
-    return _advance_topic("rust")
-
-
-@mcp.tool
-def reset_rust_progress() -> str:
-    """Reset Rust learning progress."""
-    return _reset_progress("rust")
-
-
-# --- C++ Tools ---
-@mcp.tool
-def get_cpp_topic() -> Dict[str, Any]:
-    """Get the current C++ topic the user is learning."""
-    return _get_topic("cpp")
-
-
-@mcp.tool
-def advance_cpp_topic() -> Dict[str, Any]:
-    """Advance to the next C++ topic and return it."""
-    return _advance_topic("cpp")
+    async def reset_progress() -> str:
+        return await _reset_progress(language)
 
+    mcp.tool(
+        name=f"get_{language}_topic",
+        description=f"Get the current {label} topic the user is learning.",
+    )(get_topic)
+    mcp.tool(
+        name=f"advance_{language}_topic",
+        description=f"Advance to the next {label} topic and return it.",
+    )(advance_topic)
+    mcp.tool(
+        name=f"reset_{language}_progress",
+        description=f"Reset {label} learning progress.",
+    )(reset_progress)
 
-@mcp.tool
-def reset_cpp_progress() -> str:
-    """Reset C++ learning progress."""
-    return _reset_progress("cpp")
 
+for _language, _label in LANGUAGES.items():
+    _register_language_tools(_language, _label)
 
-# --- Python Tools ---
-@mcp.tool
-def get_python_topic() -> Dict[str, Any]:
-    """Get the current Python topic the user is learning."""
-    return _get_topic("python")
 
+def _parse_britannica(html: bytes) -> str:
+    """Extract the featured event, events and births from a Britannica page."""
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=_BRITANNICA_STRAINER)
 
-@mcp.tool
-def advance_python_topic() -> Dict[str, Any]:
-    """Advance to the next Python topic and return it."""
-    return _advance_topic("python")
+    facts = ["--- BRITANNICA EVENTS ---"]
+    
+    featured = soup.find("div", class_="otd-featured-event")
+    if featured:
+        year = featured.find("div", class_="date-label")
+        title = featured.find("div", class_="title")
+        if year and title:
+            facts.append(f"Featured: {year.get_text().strip()}: {title.get_text().strip()}")
+
+    events = soup.find_all("div", class_="md-history-event", limit=5)
+    for event in events:
+        year = event.find("div", class_="date-label")
+        body = event.find("div", class_="card-body")
+        if year and body:
+            text = body.get_text(separator=" ").strip()
+            if "Read today's edition" in text:
+                text = text.split("Read today's edition")[0].strip()
+            text = " ".join(text.split())
+            facts.append(f"{year.get_text().strip()}: {text}")
+
+    born_section = soup.find_all("div", class_="md-history-born", limit=5)
+    for born in born_section:
+        year = born.find("div", class_="date-label")
+        name = born.find("a", class_="font-weight-bold")
+        desc = born.find("div", class_="identifier")
+        if year and name:
+            info = f"Birth: {year.get_text().strip()} - {name.get_text().strip()}"
+            if desc:
+                info += f" ({desc.get_text().strip()})"
+            facts.append(info)
+
+    return "\n".join(facts) if len(facts) > 1 else "No Britannica facts found."
+
+
+# Birth/death markers in Wikipedia's hlist entries, e.g. "Name (b. 1950)".
+# Word boundaries keep words like "Club." or "Fried" from matching.
+_BORN_RE = re.compile(r"\b(?:b\.|[Bb]orn\b)")
+_DIED_RE = re.compile(r"\b(?:d\.|[Dd]ied\b)")
+
+
+def _parse_wikipedia(html: bytes) -> str:
+    """Extract events, births and deaths from Wikipedia's On this day page."""
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=_WIKIPEDIA_STRAINER)
+    facts = ["--- WIKIPEDIA EVENTS ---"]
+    
+    content = soup.find("div", class_="mw-parser-output")
+    if not content:
+        return "No Wikipedia facts found."
+
+    # Get the first <ul> for main events
+    events_ul = None
+    for ul in content.find_all("ul", recursive=False):
+        if ul.find("li"):
+            events_ul = ul
+            break
+    
+    if events_ul:
+        for item in events_ul.find_all("li", limit=8):
+            facts.append(item.get_text().strip())
+
+    # Extract births/deaths from hlist sections
+    hlist_divs = content.find_all("div", class_="hlist")
+    for hlist_div in hlist_divs:
+        for li in hlist_div.find_all("li", limit=5):
+            text = li.get_text().strip()
+            if _BORN_RE.search(text):
+                facts.append(f"Birth: {text}")
+            elif _DIED_RE.search(text):
+                facts.append(f"Death: {text}")
+
+    return "\n".join(facts) if len(facts) > 1 else "No Wikipedia facts found."
+
+
+def _parse_onthisday(html: bytes) -> str:
+    """Extract events and birthdays from the onthisday.com home page."""
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=_ONTHISDAY_STRAINER)
+    facts = ["--- ONTHISDAY.COM EVENTS ---"]
+    
+    # Events
+    event_list = soup.find("ul", class_="event-list")
+    if event_list:
+        for li in event_list.find_all("li", class_="event", limit=8):
+            facts.append(li.get_text().strip())
+    
+    # Birthdays
+    # Usually in a photo-list or similar on the home page
+    birthdays = soup.find("ul", class_="photo-list")
+    if birthdays:
+        for li in birthdays.find_all("li", limit=5):
+            facts.append(f"Birth: {li.get_text().strip()}")
 
+    return "\n".join(facts) if len(facts) > 1 else "No OnThisDay facts found."
 
-@mcp.tool
-def reset_python_progress() -> str:
-    """Reset Python learning progress."""
-    return _reset_progress("python")
 
+# Parsing is CPU-bound, so it runs in a worker thread to keep the event loop
+# (and every other tool call) responsive while a page is being parsed.
 
-@mcp.tool
-def get_history_britannica() -> str:
-    """Get raw historical events from Britannica for today. Use this alongside Wikipedia for a comprehensive view."""
+@_cached_for_today
+async def _fetch_britannica() -> str:
+    """Scrape today's featured event, events and births from Britannica."""
     now = datetime.now()
     month_name = now.strftime("%B")
     day = now.day
     url = f"https://www.britannica.com/on-this-day/{month_name}-{day}"
 
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(url, timeout=10, headers=headers)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        facts = ["--- BRITANNICA EVENTS ---"]
-        
-        featured = soup.find("div", class_="otd-featured-event")
-        if featured:
-            year = featured.find("div", class_="date-label")
-            title = featured.find("div", class_="title")
-            if year and title:
-                facts.append(f"Featured: {year.get_text().strip()}: {title.get_text().strip()}")
-
-        events = soup.find_all("div", class_="md-history-event", limit=5)
-        for event in events:
-            year = event.find("div", class_="date-label")
-            body = event.find("div", class_="card-body")
-            if year and body:
-                text = body.get_text(separator=" ").strip()
-                if "Read today's edition" in text:
-                    text = text.split("Read today's edition")[0].strip()
-                text = " ".join(text.split())
-                facts.append(f"{year.get_text().strip()}: {text}")
-
-        born_section = soup.find_all("div", class_="md-history-born", limit=5)
-        for born in born_section:
-            year = born.find("div", class_="date-label")
-            name = born.find("a", class_="font-weight-bold")
-            desc = born.find("div", class_="identifier")
-            if year and name:
-                info = f"Birth: {year.get_text().strip()} - {name.get_text().strip()}"
-                if desc:
-                    info += f" ({desc.get_text().strip()})"
-                facts.append(info)
-
-        return "\n".join(facts) if len(facts) > 1 else "No Britannica facts found."
+        html = await _fetch_html(url)
+        return await asyncio.to_thread(_parse_britannica, html)
     except Exception as e:
         logger.error(f"Britannica error: {e}")
         return f"Error fetching Britannica: {e}"
 
 
-@mcp.tool
-def get_history_today() -> str:
-    """Get raw historical events from Wikipedia for today. Use this alongside Britannica for a comprehensive view."""
+@_cached_for_today
+async def _fetch_wikipedia() -> str:
+    """Scrape today's events, births and deaths from Wikipedia's On this day."""
     url = "https://en.wikipedia.org/wiki/Wikipedia:On_this_day/Today"
     
     try:
-        headers = {"User-Agent": "DiscordBot/1.0"}
-        response = requests.get(url, timeout=10, headers=headers)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        facts = ["--- WIKIPEDIA EVENTS ---"]
-        
-        content = soup.find("div", class_="mw-parser-output")
-        if not content:
-            return "No Wikipedia facts found."
-
-        # Get the first <ul> for main events
-        events_ul = None
-        for ul in content.find_all("ul", recursive=False):
-            if ul.find("li"):
-                events_ul = ul
-                break
-        
-        if events_ul:
-            for item in events_ul.find_all("li", limit=8):
-                facts.append(item.get_text().strip())
-
-        # Extract births/deaths from hlist sections
-        hlist_divs = content.find_all("div", class_="hlist")
-        for hlist_div in hlist_divs:
-            for li in hlist_div.find_all("li", limit=5):
-                text = li.get_text().strip()
-                if "b." in text or "born" in text.lower():
-                    facts.append(f"Birth: {text}")
-                elif "d." in text or "died" in text.lower():
-                    facts.append(f"Death: {text}")
-
-        return "\n".join(facts) if len(facts) > 1 else "No Wikipedia facts found."
+        html = await _fetch_html(url, headers={"User-Agent": "DiscordBot/1.0"})
+        return await asyncio.to_thread(_parse_wikipedia, html)
     except Exception as e:
         logger.error(f"Wikipedia error: {e}")
         return f"Error fetching Wikipedia: {e}"
 
 
-@mcp.tool
-def get_history_on_this_day() -> str:
-    """Get raw historical events from onthisday.com for today. Use this alongside other tools for a comprehensive view."""
+@_cached_for_today
+async def _fetch_onthisday() -> str:
+    """Scrape today's events and birthdays from the onthisday.com home page."""
     url = "https://www.onthisday.com/"
     
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(url, timeout=10, headers=headers)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        facts = ["--- ONTHISDAY.COM EVENTS ---"]
-        
-        # Events
-        event_list = soup.find("ul", class_="event-list")
-        if event_list:
-            for li in event_list.find_all("li", class_="event", limit=8):
-                facts.append(li.get_text().strip())
-        
-        # Birthdays
-        # Usually in a photo-list or similar on the home page
-        birthdays = soup.find("ul", class_="photo-list")
-        if birthdays:
-            for li in birthdays.find_all("li", limit=5):
-                facts.append(f"Birth: {li.get_text().strip()}")
-
-        return "\n".join(facts) if len(facts) > 1 else "No OnThisDay facts found."
+        html = await _fetch_html(url)
+        return await asyncio.to_thread(_parse_onthisday, html)
     except Exception as e:
         logger.error(f"OnThisDay error: {e}")
         return f"Error fetching OnThisDay: {e}"
 
 
+@mcp.tool
+async def get_history_britannica() -> str:
+    """Get raw historical events from Britannica for today. Use this alongside Wikipedia for a comprehensive view."""
+    return await _fetch_britannica()
+
+
+@mcp.tool
+async def get_history_today() -> str:
+    """Get raw historical events from Wikipedia for today. Use this alongside Britannica for a comprehensive view."""
+    return await _fetch_wikipedia()
+
+
+@mcp.tool
+async def get_history_on_this_day() -> str:
+    """Get raw historical events from onthisday.com for today. Use this alongside other tools for a comprehensive view."""
+    return await _fetch_onthisday()
+
+
+@mcp.tool
+async def get_history_all() -> str:
+    """Get raw historical events for today from Wikipedia, Britannica and onthisday.com in one call.
+
+    The three sources are fetched concurrently. Prefer this over calling the
+    individual history tools one by one.
+    """
+    sources = ("Wikipedia", "Britannica", "OnThisDay")
+    results = await asyncio.gather(
+        _fetch_wikipedia(), _fetch_britannica(), _fetch_onthisday(),
+        return_exceptions=True,
+    )
+    sections = []
+    for source, result in zip(sources, results):
+        if isinstance(result, BaseException):
+            logger.error(f"{source} error: {result}")
+            result = f"Error fetching {source}: {result}"
+        sections.append(result)
+    return "\n\n".join(sections)
+
+
 if __name__ == "__main__":
     mcp.run(transport="http", host="0.0.0.0", port=8000)